@@ -0,0 +1,156 @@
+"""Benchmarks for megadescribe on frames shaped like the ones we pull: tall,
+   wide, full of date strings, high-cardinality text, or mostly null.
+
+   python benchmark_megadescribe.py [--scale 0.01] [--json] [shape ...]
+
+   Every public function and stage is timed on every shape, with the peak
+   memory it allocated as tracemalloc sees it. --scale shrinks the frames
+   from production size (10M rows tall, 2,000 columns wide) for quick runs.
+   The frames are seeded, so runs at the same scale are comparable."""
+import megadescribe as md
+import numpy as np
+import pandas as pd
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+def tall_frame(rows=10000000,seed=0):
+    """A few columns of every kind, over many rows"""
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'amount':rng.lognormal(3,1,rows),
+        'quantity':rng.randint(0,100,rows),
+        'created':pd.Timestamp('2015-01-01') +
+                  pd.to_timedelta(rng.randint(0,365 * 24 * 3600,rows),unit='s'),
+        'status':rng.choice(['open','closed','pending','void'],rows,
+                            p=[0.6,0.3,0.09,0.01]).astype(object),
+        'activeyn':rng.choice(['Y','N'],rows).astype(object),
+    })
+
+def wide_frame(columns=2000,rows=10000,seed=0):
+    """Many columns, mostly numeric, some text"""
+    rng = np.random.RandomState(seed)
+    data = {}
+    for i in range(columns):
+        if i % 4 == 3:
+            data['text_{}'.format(i)] = rng.choice(list('abcdefgh'),rows) \
+                                           .astype(object)
+        else:
+            data['value_{}'.format(i)] = rng.normal(0,1,rows)
+    return pd.DataFrame(data)
+
+def date_string_frame(rows=1000000,seed=0):
+    """Dates written as text, as they come out of many extracts"""
+    rng = np.random.RandomState(seed)
+    days = pd.Timestamp('2010-01-01') + \
+           pd.to_timedelta(rng.randint(0,5000,rows),unit='D')
+    return pd.DataFrame({
+        'iso':days.strftime('%Y-%m-%d').values.astype(object),
+        'us':days.strftime('%m/%d/%Y').values.astype(object),
+        'value':rng.normal(0,1,rows),
+    })
+
+def high_cardinality_frame(rows=1000000,seed=0):
+    """Near-unique text: emails, GUIDs not ending in 'id', free text"""
+    rng = np.random.RandomState(seed)
+    users = rng.randint(0,rows,rows)
+    return pd.DataFrame({
+        'email':np.array(['user{}@example.com'.format(u) for u in users],
+                         dtype=object),
+        'guid':np.array(['{:032x}'.format(g) for g in
+                         rng.randint(0,2 ** 62,rows,dtype=np.int64)],
+                        dtype=object),
+        'value':rng.normal(0,1,rows),
+    })
+
+def mostly_null_frame(rows=1000000,seed=0,null_share=0.99):
+    """Columns that are almost entirely null"""
+    rng = np.random.RandomState(seed)
+    nulls = rng.uniform(size=(3,rows)) < null_share
+    return pd.DataFrame({
+        'value':np.where(nulls[0],np.nan,rng.normal(0,1,rows)),
+        'code':pd.Series(rng.choice(list('xyz'),rows)).where(~nulls[1]).values,
+        'count':pd.Series(rng.randint(0,9,rows)).where(~nulls[2]).values,
+    })
+
+shapes = {
+    'tall':lambda scale: tall_frame(rows=max(100,int(10000000 * scale))),
+    'wide':lambda scale: wide_frame(columns=max(8,int(2000 * scale))),
+    'dates':lambda scale: date_string_frame(rows=max(100,int(1000000 * scale))),
+    'high_cardinality':lambda scale: high_cardinality_frame(
+        rows=max(100,int(1000000 * scale))),
+    'mostly_null':lambda scale: mostly_null_frame(
+        rows=max(100,int(1000000 * scale))),
+}
+
+def measure(func,*args,**kwargs):
+    """Run func, returning its result, its wall time in seconds, and the
+       peak memory it allocated in bytes. Tracing the allocations slows
+       everything down, so the time comes from a run without it, and the
+       memory from a second run. Anything func prints is dropped."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args,**kwargs)
+        seconds = time.perf_counter() - start
+        tracemalloc.start()
+        try:
+            func(*args,**kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+def benchmark(df):
+    """Time and peak memory of each stage and public function on df"""
+    colclass, seconds, peak = measure(md.column_classifier,df)
+    timings = {'column_classifier':(seconds,peak)}
+    stages = [
+        ('continuous_stats',md.continuous_stats,(df,colclass.numerics())),
+        ('pivots',lambda: [md._pivot(df[col])
+                           for col in colclass.categoricals()],()),
+        ('surface_unusual_rows',md.surface_unusual_rows,
+         (df,colclass.dates(),colclass.numerics(),colclass.categoricals())),
+        ('describe_data',md.describe_data,(df,)),
+        ('megadescribe',md.megadescribe,(df,)),
+    ]
+    for name, func, args in stages:
+        timings[name] = measure(func,*args)[1:]
+    return timings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('shapes',nargs='*',metavar='shape',
+                        help='Any of: ' + ', '.join(shapes))
+    parser.add_argument('--scale',type=float,default=0.01,
+                        help='Size relative to production, 1 being full size')
+    parser.add_argument('--json',action='store_true')
+    args = parser.parse_args(argv)
+    for shape in args.shapes:
+        if shape not in shapes:
+            parser.error('unknown shape {!r}'.format(shape))
+
+    results = {}
+    for shape in args.shapes or list(shapes):
+        df = shapes[shape](args.scale)
+        results[shape] = {'rows':len(df),'columns':len(df.columns),
+                          'stages':{name:{'seconds':seconds,'peak_bytes':peak}
+                                    for name, (seconds, peak)
+                                    in benchmark(df).items()}}
+    if args.json:
+        json.dump(results,sys.stdout,indent=2)
+        print()
+        return results
+    for shape, result in results.items():
+        md.header('{} ({:,} rows x {:,} columns)'.format(
+            shape,result['rows'],result['columns']))
+        for name, stage in result['stages'].items():
+            print('{:<22}{:>10.3f} s{:>12,.1f} MB'.format(
+                name,stage['seconds'],stage['peak_bytes'] / 2 ** 20))
+    return results
+
+if __name__ == '__main__':
+    main()
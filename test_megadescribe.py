@@ -4,8 +4,12 @@ import random
 import string
 import pandas as pd
 from datetime import datetime as dt, timedelta as td
+import os
 import pytest
+import sqlite3
+import subprocess
 import sys
+import json
 
 def test_typeerror_at_initiation():
     with pytest.raises(TypeError):
@@ -36,6 +40,25 @@ def test_column_classifications():
     assert set(instance.numerics()).issubset(set(numeric_columns))
     assert set(instance.categoricals()).issubset(set(categorical_columns))
 
+def test_date_detection_sampled_matches_exact():
+    n = 5000
+    days = pd.Series(pd.date_range('2015-01-01',periods=n,freq='H'))
+    df = pd.DataFrame({
+        'iso': days.dt.strftime('%Y-%m-%d %H:%M'),
+        'us': days.dt.strftime('%m/%d/%Y'),
+        'mixed': days.dt.strftime('%Y-%m-%d').where(days.index % 2 == 0,
+                                                    days.dt.strftime('%b %d %Y')),
+        'one_bad': days.dt.strftime('%Y-%m-%d').where(days.index != n - 1,'oops'),
+        'words': [random.choice(['alpha','beta','gamma']) for _ in range(n)],
+        'nums': np.random.uniform(0,1000,n),
+    })
+    sampled = md.column_classifier(df)
+    exact = md.column_classifier(df,date_sample=None)
+    assert sampled.dates() == exact.dates() == ['iso','us','mixed']
+    # A small enough share of junk values is tolerated when asked for
+    lenient = md.column_classifier(df,date_confidence=0.999)
+    assert 'one_bad' in lenient.dates()
+
 ############################
 # Unusual row finder tests #
 ############################
@@ -53,4 +76,707 @@ def test_categorical_score_same_value():
     # We'll try lenth 1, and five randomly sampled lengths between 2 and 100
     score_for_uniform_values(1)
     for n in random.sample(range(2,101), 5):
-        score_for_uniform_values(n)
\ No newline at end of file
+        score_for_uniform_values(n)
+
+
+def test_continuous_stats_match_pandas():
+    n = 1000
+    df = pd.DataFrame({
+        'floats': np.random.normal(0,100,n),
+        'ints': np.random.randint(-50,50,n),
+        'sparse': np.where(np.random.uniform(size=n) < 0.9,np.nan,
+                           np.random.uniform(size=n)),
+        'single': [np.nan] * (n - 1) + [3.0],
+    })
+    out = md.continuous_stats(df,list(df.columns))
+    assert list(out.index) == list(df.columns)
+    for col in df.columns:
+        s = df[col]
+        expected = [s.count(),s.sum(),s.mean(),s.isnull().mean(),s.min(),
+                    s.quantile(0.1),s.quantile(0.5),s.quantile(0.9),s.max()]
+        assert np.allclose(out.loc[col].values,expected)
+
+    # Sums of integers past 2**53 stay exact
+    big = pd.DataFrame({'big':[2**53 + 1,3,1],'small':[1.5,2.0,2.5]})
+    cache = md.describe_cache()
+    for data in [big,big] + ([md.pa.Table.from_pandas(big)] if md.pa else []):
+        sums = md.continuous_stats(data,['big','small'],cache=cache)['sum']
+        assert int(sums['big']) == 9007199254740997 and sums['small'] == 6
+
+def test_categorical_score_rarity():
+    values = ['a'] * 50 + ['b'] * 30 + ['c'] * 15 + ['d'] * 5 + [None] * 3
+    random.shuffle(values)
+    df = pd.DataFrame({'A':values},index=np.arange(len(values)) * 2)
+    out = md.surface_unusual_rows(df).categorical_score('A')
+    freq = {'a':50 / 100,'b':30 / 100,'c':15 / 100,'d':5 / 100}
+    expected = {k:(0.5 / v - 1) / (0.5 / 0.05 - 1) for k,v in freq.items()}
+    assert out.index.equals(df.index)
+    assert np.array_equal(out.values,df['A'].map(expected).values,
+                          equal_nan=True)
+    assert md.surface_unusual_rows(
+        pd.DataFrame({'A':[None] * 4})).categorical_score('A') is None
+
+def test_top_unusual_rows():
+    n = 500
+    df = pd.DataFrame({'num':np.random.uniform(0,1,n),
+                       'cat':[random.choice('aab') for _ in range(n)]},
+                      index=np.random.permutation(n) + 1000)
+    instance = md.surface_unusual_rows(df,numerics=['num'],
+                                       categoricals=['cat'])
+    top = instance.top(7)
+    assert list(top.columns.levels[0]) == ['values','scores']
+    assert top['values'].equals(df.iloc[[df.index.get_loc(i)
+                                         for i in top.index]])
+    totals = instance.scores.sum(axis=1)
+    assert np.allclose(top['scores'].sum(axis=1).values,
+                       totals.sort_values(ascending=False).values[:7])
+    assert len(instance.top(n + 10)) == n
+    assert len(instance.top(0)) == 0
+
+    # Ties go to the earlier position, as a stable sort would have it
+    for seed in range(20):
+        total = np.random.RandomState(seed).randint(0,3,100).astype(float)
+        stable = np.argsort(-total,kind='stable')[:10]
+        assert list(md._top_positions(total,10)) == list(stable)
+
+#####################
+# Out-of-core tests #
+#####################
+
+def test_quantile_sketch():
+    values = np.random.normal(0,1,200000)
+    small = md.quantile_sketch(k=256)
+    small.update(values[:100])
+    assert small.exact()
+    assert np.allclose(small.quantile([0.1,0.5,0.9]),
+                       np.quantile(values[:100],[0.1,0.5,0.9]))
+    ranks = pd.Series(values[:100]).rank(pct=True).values
+    assert np.allclose(small.percentile_rank(values[:100]),ranks)
+
+    sketch = md.quantile_sketch(k=256)
+    for chunk in np.array_split(values[:100000],7):
+        sketch.update(chunk)
+    sketch.merge(md.quantile_sketch(k=256).update(values[100000:]))
+    assert sketch.n == len(values)
+    assert sum(len(level) for level in sketch.levels) < 256 * 20
+    assert sketch.min == values.min() and sketch.max == values.max()
+    truth = np.quantile(values,[0.1,0.5,0.9])
+    assert np.allclose(sketch.quantile([0.1,0.5,0.9]),truth,atol=0.05)
+
+def test_stream_describer_matches_in_memory():
+    n = 3000
+    df = pd.DataFrame({
+        'num':np.where(np.random.uniform(size=n) < 0.1,np.nan,
+                       np.random.normal(0,1,n)),
+        'cat':[random.choice('aaabbc') for _ in range(n)],
+    })
+    chunks = [df.iloc[i:i + 700] for i in range(0,n,700)]
+    state = md.stream_describer(sketch_size=4096)
+    for chunk in chunks:
+        state.update(chunk)
+    assert np.allclose(state.continuous_stats().values,
+                       md.continuous_stats(df,['num']).values,equal_nan=True)
+    pivot = state.pivots()[0]
+    assert pivot.top.equals(pd.value_counts(df['cat'].values).iloc[:5])
+    assert (pivot.nulls, pivot.rows, pivot.error) == (0, n, 0)
+    # Ties in counts go to the value seen first
+    ties = pd.DataFrame({'cat':list('dcbaeffg' * 50)})
+    tied = md.stream_describer().update(ties.iloc[:150]).update(ties.iloc[150:])
+    assert list(tied.pivots()[0].top.index) == list('fdcba')
+
+    expected = md.surface_unusual_rows(df,numerics=['num'],
+                                       categoricals=['cat']).top(5)
+    found = state.top(chunks,5)
+    # Rows can tie, so compare the scores rather than which rows they are
+    assert np.allclose(found['scores'].sum(axis=1).values,
+                       expected['scores'].sum(axis=1).values)
+    rescored = md.surface_unusual_rows(df,numerics=['num'],
+                                       categoricals=['cat']).scores
+    assert np.allclose(found['scores'].values,
+                       rescored.loc[found.index].values,equal_nan=True)
+
+def test_megadescribe_stream_runs(capsys):
+    df = pd.DataFrame({'num':np.random.uniform(0,1,100),
+                       'cat':[random.choice('ab') for _ in range(100)]})
+    md.megadescribe_stream(df.iloc[i:i + 30] for i in range(0,100,30))
+    md.megadescribe_stream(lambda: (df.iloc[i:i + 30]
+                                    for i in range(0,100,30)))
+    out = capsys.readouterr().out
+    assert out.count('Continuous Variables') == 2
+    assert out.count('rare categories') == 2
+    with pytest.raises(TypeError):
+        md.megadescribe_stream([df.to_dict('list')])
+
+def test_heavy_hitters_and_distinct_counter():
+    frequent = ['x'] * 3000 + ['y'] * 2000 + ['z'] * 1000
+    unique = ['guid-{}'.format(i) for i in range(20000)]
+    values = np.array(frequent + unique,dtype=object)
+    np.random.shuffle(values)
+
+    hitters = md.heavy_hitters(capacity=50)
+    for part in np.array_split(values,9):
+        hitters.update(part)
+    counts = hitters.counts()
+    assert len(counts) <= 50
+    assert hitters.error <= len(values) / 51
+    assert list(counts.index[:3]) == ['x','y','z']
+    assert counts['x'] <= 3000 <= counts['x'] + hitters.error
+
+    distinct = md.distinct_counter()
+    for part in np.array_split(values,4):
+        distinct.update(part)
+    assert abs(distinct.estimate() - 20003) < 20003 * 0.05
+    assert abs(md.distinct_counter().update(['a','b',None]).estimate() - 2) < 0.1
+
+def test_bounded_pivot_is_exact_for_the_top_values():
+    values = ['a'] * 500 + ['b'] * 300 + [str(i) for i in range(5000)] + \
+             [None] * 10
+    random.shuffle(values)
+    series = pd.Series(values,name='text')
+    bounded = md._pivot(series,counters=20,block=1000)
+    exact = md._pivot(series)
+    assert bounded.top.iloc[:2].equals(exact.top.iloc[:2])
+    assert (bounded.nulls, bounded.rows) == (10, len(values))
+    assert abs(bounded.distinct - 5002) < 5002 * 0.05
+
+##################
+# Parallel tests #
+##################
+
+def test_workers_match_serial(capsys):
+    n = 400
+    df = pd.DataFrame({
+        'when':pd.Series(pd.date_range('2019-01-01',periods=n,freq='D')),
+        'when_text':pd.date_range('2019-01-01',periods=n,freq='D')
+                      .strftime('%Y-%m-%d'),
+        'a':np.random.normal(0,1,n),
+        'b':np.random.randint(0,10,n),
+        'cat':[random.choice('aaabbc') for _ in range(n)],
+    })
+    serial = md.column_classifier(df)
+    parallel = md.column_classifier(df,workers=2)
+    assert serial.dates() == parallel.dates()
+    assert serial.numerics() == parallel.numerics()
+    assert serial.categoricals() == parallel.categoricals()
+
+    stats = md.continuous_stats(df,['a','b'],workers=2)
+    assert np.allclose(stats.values,md.continuous_stats(df,['a','b']).values)
+
+    kinds = dict(dates=serial.dates(),numerics=serial.numerics(),
+                 categoricals=serial.categoricals())
+    expected = md.surface_unusual_rows(df,**kinds).scores
+    found = md.surface_unusual_rows(df,workers=2,**kinds).scores
+    assert found.equals(expected)
+
+    md.megadescribe(df,workers=2)
+    assert 'rare categories' in capsys.readouterr().out
+
+def test_workers_leave_stderr_clean():
+    # Run fresh, since the warnings come from the resource trackers of
+    # the processes as they exit
+    script = '''
+import megadescribe as md, numpy as np, pandas as pd
+if __name__ == '__main__':
+    df = pd.DataFrame({'s':np.array(list('abc') * 500,dtype=object),
+                       'a':np.random.normal(0,1,1500),
+                       'b':np.random.normal(0,1,1500)})
+    md.megadescribe(df,workers=2)
+'''
+    done = subprocess.run([sys.executable,'-c',script],capture_output=True,
+                          text=True,cwd=os.path.dirname(md.__file__))
+    assert done.returncode == 0
+    assert done.stderr == ''
+
+def test_describe_data_displays_nothing(capsys):
+    df = pd.DataFrame({'num':np.random.uniform(0,1,50),
+                       'cat':[random.choice('ab') for _ in range(50)],
+                       'empty':[None] * 50})
+    result = md.describe_data(df,n=3)
+    assert capsys.readouterr().out == ''
+    assert result.numerics == ['num']
+    assert [p.column for p in result.pivots] == ['cat','empty']
+    assert result.stats.loc['num','count'] == 50
+    assert len(result.unusual_index()) == 3
+    assert json.loads(json.dumps(result.to_dict()))['pivots'][1]['top'] == []
+    result.show()
+    assert 'Continuous Variables' in capsys.readouterr().out
+
+    only_text = md.describe_data(df[['cat']])
+    assert only_text.stats.empty
+    assert md.describe_data(df.iloc[:0]).unusual is None
+
+def test_describe_cache_only_redoes_changed_columns(tmpdir):
+    n = 200
+    df = pd.DataFrame({'num':np.random.uniform(0,1,n),
+                       'other':np.random.uniform(0,1,n),
+                       'cat':[random.choice('abc') for _ in range(n)]})
+    cache = md.describe_cache(maxsize=100)
+    first = md.describe_data(df,cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3 + 1 + 2)
+    changed = df.copy()
+    changed.loc[0,'num'] = 5.0
+    second = md.describe_data(changed,cache=cache)
+    # Only 'num' is classified and summarized again
+    assert cache.misses == 6 + 2
+    assert second.stats.loc['num','max'] == 5.0
+    assert second.stats.loc['other'].equals(first.stats.loc['other'])
+    assert second.to_dict()['pivots'] == first.to_dict()['pivots']
+
+    # Edited in place, the same frame is hashed again
+    changed['num'] *= 100
+    changed.loc[0,'cat'] = 'zzz'
+    third = md.describe_data(changed,cache=cache)
+    assert third.stats.loc['num','max'] == 500.0
+    assert 'zzz' in third.pivots[0].top.index
+
+    small = md.describe_cache(maxsize=2)
+    md.describe_data(df,cache=small)
+    assert len(small) == 2
+
+    path = str(tmpdir.join('cache'))
+    ondisk = md.describe_cache(path=path)
+    md.describe_data(df,cache=ondisk)
+    ondisk.close()
+    reopened = md.describe_cache(path=path)
+    md.describe_data(df,cache=reopened)
+    assert reopened.misses == 0
+    reopened.close()
+
+def test_benchmark_frames_are_seeded():
+    import benchmark_megadescribe as bench
+    for shape in bench.shapes.values():
+        assert shape(0.0001).equals(shape(0.0001))
+    df = bench.mostly_null_frame(rows=300)
+    timings = bench.benchmark(df)
+    assert set(timings) == {'column_classifier','continuous_stats','pivots',
+                            'surface_unusual_rows','describe_data',
+                            'megadescribe'}
+    assert all(seconds >= 0 and peak > 0 for seconds, peak in timings.values())
+
+def test_profile_records_stages_and_columns(capsys):
+    df = pd.DataFrame({'num':np.random.uniform(0,1,300),
+                       'cat':[random.choice('abc') for _ in range(300)]})
+    result = md.describe_data(df,profile=True)
+    stages = [r['stage'] for r in result.profile['stages']]
+    assert stages == ['classify','pivots','continuous','dates','unusual']
+    columns = {(r['stage'],r['column']) for r in result.profile['columns']}
+    assert columns == {('classify','num'),('classify','cat'),
+                       ('pivots','cat'),('score','num'),('score','cat')}
+    for record in result.profile['stages'] + result.profile['columns']:
+        assert record['rows'] == 300
+        assert record['seconds'] >= 0 and record['peak_bytes'] >= 0
+    # A stage's peak covers the peaks of the columns inside it
+    unusual = result.profile['stages'][-1]['peak_bytes']
+    assert all(unusual >= r['peak_bytes'] for r in result.profile['columns']
+               if r['stage'] == 'score')
+
+    seen = []
+    profile = md.megadescribe(df,profile=seen.append)
+    assert profile['stages'][-1]['stage'] == 'render'
+    assert len(seen) == len(profile['stages']) + len(profile['columns'])
+    assert md.profiler(memory=False).to_json() == \
+           '{"stages": [], "columns": []}'
+
+def test_compact_scores_match_full_scores():
+    n = 2000
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({'a':rng.normal(0,1,n),
+                       'b':rng.exponential(1,n),
+                       'cat':rng.choice(list('aaaabbbc'),n).astype(object),
+                       'empty':[None] * n})
+    kinds = dict(numerics=['a','b'],categoricals=['cat','empty'])
+    full = md.surface_unusual_rows(df,**kinds)
+    compact = md.surface_unusual_rows(df,compact=True,**kinds)
+    assert compact.scores is None
+    assert compact.total.dtype == np.float32
+    assert np.allclose(compact.total,full.total,atol=1e-5)
+
+    top = compact.top(5)
+    expected = full.scores.loc[top.index]
+    assert np.allclose(top['scores'][['a','b','cat']].values,
+                       expected[['a','b','cat']].values.astype(float))
+    assert top['scores']['empty'].isnull().all()
+    unscored = compact.top(5,breakdown=False)
+    assert set(unscored.columns.get_level_values(0)) == {'values'}
+
+    full_description = md.describe_data(df)
+    compact_description = md.describe_data(df,compact=True)
+    assert compact_description.unusual_index() == \
+           full_description.unusual_index()
+    assert 'scores' in compact_description.unusual
+    pooled = md.describe_data(df,compact=True,workers=2)
+    assert pooled.unusual_index() == full_description.unusual_index()
+
+def test_cont_score_exact_and_approximate():
+    n = 100000
+    values = pd.Series(np.where(np.random.uniform(size=n) < 0.05,np.nan,
+                                np.random.lognormal(0,1,n)))
+    instance = md.surface_unusual_rows(pd.DataFrame({'v':values}))
+    exact = instance.cont_score(values,'v')
+    expected = values.rank(pct=True).map(lambda x: 2 * abs(0.5 - x))
+    assert np.array_equal(exact.values,expected.values,equal_nan=True)
+
+    approx = md.surface_unusual_rows(pd.DataFrame({'v':values}),
+                                     approx_ranks=10000)
+    estimate = approx.cont_score(values,'v')
+    assert np.array_equal(np.isnan(estimate.values),np.isnan(exact.values))
+    # Well within twice the 99.9% DKW bound for 10,000 samples
+    assert np.nanmax(np.abs(estimate.values - exact.values)) < 2 * 0.0195
+    totals = md.surface_unusual_rows(pd.DataFrame({'v':values}),
+                                     numerics=['v'],approx_ranks=10000).total
+    assert np.allclose(totals,np.nan_to_num(estimate.values))
+
+def test_date_seconds_match_per_value_conversion():
+    days = pd.date_range('2000-01-01',periods=50,freq='17H')
+    text = pd.Series(np.random.choice(days.strftime('%Y-%m-%d %H:%M'),5000))
+    text[::7] = None
+    text[::11] = 'not a date'
+    native = pd.Series(np.random.choice(days,5000))
+    native[::13] = pd.NaT
+    mixed = pd.Series([days[0],'2001-02-03',None,3,'',dt(1999,1,1)] * 10)
+    for series in [text,native,mixed,pd.Series(np.arange(10.))]:
+        expected = series.map(md._dtseconds).astype(float)
+        found = md._date_seconds(series)
+        assert found.index.equals(series.index)
+        assert np.allclose(found.values,expected.values,equal_nan=True)
+
+def test_describe_sql_matches_describe_data():
+    rng = np.random.RandomState(3)
+    df = pd.DataFrame({
+        'amount':np.where(rng.uniform(size=500) < 0.1,np.nan,
+                          rng.lognormal(0,1,500)),
+        'quantity':rng.randint(0,20,500).astype(float),
+        'status':pd.Series(rng.choice(['open','closed','void'],500,
+                                      p=[0.7,0.29,0.01])).where(
+                                          rng.uniform(size=500) > 0.05),
+    })
+    connection = sqlite3.connect(':memory:')
+    df.to_sql('orders',connection,index=False)
+    found = md.describe_sql(connection,'SELECT * FROM orders;',n=10)
+    expected = md.describe_data(df,n=10)
+    assert found.numerics == expected.numerics
+    assert found.categoricals == expected.categoricals
+    assert np.allclose(found.stats.values.astype(float),
+                       expected.stats.values.astype(float))
+    assert found.pivots[0].top.to_dict() == expected.pivots[0].top.to_dict()
+    assert found.pivots[0].nulls == expected.pivots[0].nulls
+    columns = ['amount','quantity','status']
+    assert np.allclose(found.unusual['scores'][columns].sum(axis=1).values,
+                       expected.unusual['scores'][columns].sum(axis=1).values)
+    assert found.unusual_index() == expected.unusual_index()
+
+    # Dates julianday() can't read are described as categorical
+    days = pd.DataFrame({'us':pd.date_range('2020-01-01',periods=50)
+                                .strftime('%m/%d/%Y'),
+                         'num':np.arange(50.)})
+    days.to_sql('days',connection,index=False)
+    found = md.describe_sql(connection,'SELECT * FROM days')
+    assert found.dates == [] and found.categoricals == ['us']
+    assert not found.unusual['scores'].isnull().any().any()
+
+def test_arrow_and_polars_match_pandas():
+    pa = pytest.importorskip('pyarrow')
+    rng = np.random.RandomState(1)
+    df = pd.DataFrame({
+        'amount':np.where(rng.uniform(size=1000) < 0.1,np.nan,
+                          rng.lognormal(0,1,1000)),
+        'small':rng.randint(0,5,1000).astype(np.int8),
+        'userid':rng.randint(0,100,1000),
+        'status':pd.Series(rng.choice(['open','closed','void'],1000,
+                                      p=[0.7,0.29,0.01])).where(
+                                          rng.uniform(size=1000) > 0.05),
+        'when':(pd.Timestamp('2020-01-01') + pd.to_timedelta(
+            rng.randint(0,1000,1000),unit='D')).strftime('%Y-%m-%d'),
+        'empty':[None] * 1000,
+    })
+    table = pa.Table.from_pandas(df,preserve_index=False)
+    encoded = table.set_column(3,'status',table['status'].dictionary_encode())
+    frames = [table,encoded]
+    try:
+        import polars
+        frames.append(polars.from_pandas(df))
+    except ImportError:
+        pass
+    expected = md.describe_data(df,n=10)
+    for frame in frames:
+        found = md.describe_data(frame,n=10)
+        assert found.dates == expected.dates
+        assert found.numerics == expected.numerics
+        assert found.categoricals == expected.categoricals
+        assert np.allclose(found.stats.values.astype(float),
+                           expected.stats.values.astype(float),equal_nan=True)
+        for mine, theirs in zip(found.pivots,expected.pivots):
+            assert mine.top.to_dict() == theirs.top.to_dict()
+            assert mine.nulls == theirs.nulls
+        assert found.unusual_index() == expected.unusual_index()
+        assert np.allclose(found.unusual['scores'].sum(axis=1).values,
+                           expected.unusual['scores'].sum(axis=1).values)
+
+def test_sections_come_lazily_and_match_describe_data(capsys):
+    df = pd.DataFrame({'a':np.random.normal(0,1,200),
+                       'b':np.random.choice(['x','y'],200).astype(object),
+                       'c':[None] * 200})
+    kinds = [kind for kind, value in md.describe_sections(df)]
+    assert kinds == ['classification','pivot','pivot','continuous','dates',
+                     'unusual']
+
+    seen = md.profiler(memory=False)
+    sections = md.describe_sections(df,profile=seen)
+    assert next(sections).kind == 'classification'
+    sections.close()
+    assert [r['stage'] for r in seen.to_dict()['stages']] == ['classify']
+
+    md.describe_data(df).show()
+    shown = capsys.readouterr().out
+    md.megadescribe(df)
+    assert capsys.readouterr().out == shown
+
+def test_describe_groups_matches_each_group(capsys):
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'region':rng.choice(['n','s','e',None],2000),
+        'amount':np.where(rng.uniform(size=2000) < 0.1,np.nan,
+                          rng.lognormal(0,1,2000)),
+        'status':pd.Series(rng.choice(['open','closed','void'],2000,
+                                      p=[0.7,0.29,0.01])).where(
+                                          rng.uniform(size=2000) > 0.05),
+        'when':(pd.Timestamp('2020-01-01') + pd.to_timedelta(
+            rng.randint(0,1000,2000),unit='D')).strftime('%Y-%m-%d'),
+    },index=np.arange(2000) * 3)
+    grouped = md.describe_groups(df,'region',n=3)
+    assert list(grouped.nulls.index) == ['e','n','s']
+    for key, group in df.groupby('region'):
+        expected = md.describe_data(group.drop(columns='region'),n=3)
+        assert np.allclose(grouped.stats.xs(key,level=1).values.astype(float),
+                           expected.stats.values.astype(float),equal_nan=True)
+        top = grouped.pivots.loc['status'].loc[key,'count']
+        assert top.to_dict() == expected.pivots[0].top.to_dict()
+        assert grouped.nulls.loc[key,'status'] == \
+               expected.pivots[0].nulls / len(group)
+        assert list(grouped.unusual.loc[key].index) == \
+               expected.unusual_index()
+        assert np.allclose(
+            grouped.unusual['scores'].loc[key].sum(axis=1).values,
+            expected.unusual['scores'].sum(axis=1).values)
+    md.megadescribe(df,by=['region'])
+    assert 'Continuous Variables by region' in capsys.readouterr().out
+    with pytest.raises(TypeError):
+        md.megadescribe(df.to_dict('list'),by='region')
+
+def test_main_describes_files(tmp_path,capsys):
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'a':np.random.normal(0,1,100),
+                       'b':np.random.choice(['x','y'],100).astype(object),
+                       'c':np.arange(100.)})
+    df.to_csv(tmp_path / 'frame.csv',index=False)
+    df.to_parquet(tmp_path / 'frame.parquet')
+    df.to_feather(tmp_path / 'frame.feather')
+    paths = [str(tmp_path / name) for name in
+             ['frame.csv','frame.parquet','frame.feather']]
+    results = md.main(paths + ['--json','--columns','a,b'])
+    capsys.readouterr()
+    for path in paths:
+        assert results[path]['numerics'] == ['a']
+        assert results[path]['categoricals'] == ['b']
+    md.main([paths[2],'-n','3'])
+    shown = capsys.readouterr().out
+    assert 'Continuous Variables' in shown and 'Styler' not in shown
+    with pytest.raises(SystemExit):
+        md.main([str(tmp_path / 'frame.unknown')])
+    for path in paths:
+        with pytest.raises(SystemExit):
+            md.main([path,'--columns','a,missing'])
+    capsys.readouterr()
+
+    # Nulls come out as null, which strict JSON parsers accept
+    pd.DataFrame({'a':[1.0,np.nan,3.0],'b':['x',None,'y']}) \
+      .to_parquet(tmp_path / 'nulls.parquet')
+    md.main([str(tmp_path / 'nulls.parquet'),'--json'])
+    parsed = json.loads(capsys.readouterr().out,
+                        parse_constant=lambda token: pytest.fail(token))
+    unusual = parsed[str(tmp_path / 'nulls.parquet')]['unusual']
+    assert unusual and all(set(row['values']) == {'a','b'} for row in unusual)
+    assert None in [row['values']['a'] for row in unusual]
+
+def test_block_classification_matches_column_by_column():
+    df = pd.DataFrame({'num':np.random.normal(0,1,50),
+                       'userid':np.arange(50),
+                       'activeyn':np.random.choice(['Y','N'],50),
+                       'when':['2020-01-{:02d}'.format(i % 28 + 1)
+                               for i in range(50)],
+                       'stamp':pd.date_range('2020-01-01',periods=50),
+                       'empty':[np.nan] * 50,
+                       'text':[None] * 50})
+    blocks = md.column_classifier(df)
+    columns = md.column_classifier(df,profile=md.profiler(memory=False))
+    for kind in ['dates','categoricals','numerics']:
+        assert getattr(blocks,kind)() == getattr(columns,kind)()
+    assert [blocks.kind(col) for col in df.columns] == \
+           ['numeric',None,'categorical','date','date',None,'categorical']
+    assert md.column_classifier(df.iloc[:0]).kind('num') == 'date'
+
+def test_describe_diff_finds_what_moved():
+    rng = np.random.RandomState(0)
+    old = pd.DataFrame({'amount':rng.lognormal(0,1,500),
+                        'status':rng.choice(['open','closed'],500),
+                        'constant':1,'gone':2})
+    new = old.drop(columns='gone')
+    new.loc[7,['amount','status']] = [500.0,'weird']
+    new['flag'] = 0
+    new = new.sample(frac=1,random_state=1)
+    diff = md.describe_diff(old,new,n=3)
+    assert diff.added_columns == ['flag']
+    assert diff.removed_columns == ['gone']
+    # Reordered, but holding the same values
+    assert diff.unchanged == ['constant']
+    assert set(diff.changed) == {'amount','status'}
+    assert list(diff.added_rows) == [7]
+    assert list(diff.removed_rows) == [7]
+    assert diff.shares.loc[('status','weird'),'new'] == 1 / len(new)
+    assert diff.stats.loc['amount',('max','new')] == 500.0
+    assert diff.stats.loc['amount',('count','change')] == 0
+    assert list(diff.unusual.index) == [7]
+
+    same = md.describe_diff(old,old.sample(frac=1,random_state=2))
+    assert same.changed == [] and len(same.added_rows) == 0
+    assert same.unusual is None
+
+    # Cast from text to numbers: reported, not compared
+    text = old.assign(amount=old['amount'].map('{:.3f}x'.format))
+    cast = md.describe_diff(text,old)
+    assert 'amount' in cast.changed
+    assert cast.types.loc['amount'].tolist() == ['categorical','numeric']
+    assert 'amount' not in cast.stats.index
+    with pytest.raises(TypeError):
+        md.describe_diff(old.to_dict('list'),old)
+
+def test_frame_context_is_shared_and_matches():
+    df = pd.DataFrame({'num':np.where(np.random.uniform(size=300) < 0.1,
+                                      np.nan,np.random.normal(0,1,300)),
+                       'cat':pd.Series(np.random.choice(list('aab'),300))
+                               .where(np.random.uniform(size=300) > 0.1),
+                       'when':['2020-01-{:02d}'.format(i % 28 + 1)
+                               for i in range(300)]})
+    context = md.frame_context(df)
+    assert context.null_counts().to_dict() == df.isnull().sum().to_dict()
+    codes, uniques, counts = context.factorized('cat')
+    assert context.factorized('cat')[0] is codes
+    assert dict(zip(uniques,counts)) == df['cat'].value_counts().to_dict()
+    assert context.pivot('cat').top.to_dict() == \
+           md._pivot(df['cat']).top.to_dict()
+
+    # Every path breaks ties in counts the same way
+    ties = pd.DataFrame({'cat':list('dcbaeffg' * 50),'num':np.arange(400.)})
+    expected = list(md.describe_data(ties).pivots[0].top.index)
+    assert expected == list('fdcba')
+    for options in [dict(workers=2),dict(pivot_counters=10),
+                    dict(cache=md.describe_cache())]:
+        found = md.describe_data(ties,**options).pivots[0].top
+        assert list(found.index) == expected
+    unusual = md.surface_unusual_rows(df,['when'],['num'],['cat'],
+                                      context=context)
+    plain = md.surface_unusual_rows(df,['when'],['num'],['cat'])
+    assert np.allclose(unusual.scores.values.astype(float),
+                       plain.scores.values.astype(float),equal_nan=True)
+    # Once scored, a column's codes are let go
+    assert context.factorized('cat')[0] is not codes
+
+def test_date_section_matches_pandas(capsys):
+    days = pd.Timestamp('2019-01-01') + \
+           pd.to_timedelta(np.random.randint(0,60,3000),unit='D')
+    stamps = pd.Series(pd.Timestamp('2015-01-01') + pd.to_timedelta(
+        np.random.randint(0,10 ** 8,3000),unit='s'))
+    stamps[::7] = pd.NaT
+    df = pd.DataFrame({'iso':days.strftime('%Y-%m-%d'),'stamp':stamps})
+    result = md.describe_data(df)
+    table = result.date_stats
+    assert table.loc['iso','min'] == days.min()
+    assert table.loc['iso','max'] == days.max()
+    assert table.loc['iso','span'] == days.max() - days.min()
+    assert table.loc['stamp','%null'] == stamps.isnull().mean()
+    quantiles = stamps.quantile([0.1,0.5,0.9])
+    for q, stat in zip(quantiles,['10%','50%','90%']):
+        assert abs(table.loc['stamp',stat] - q) < pd.Timedelta(1,unit='us')
+    perday = result.histograms['iso']
+    assert perday.name == 'day'
+    assert perday.to_dict() == \
+           pd.Series(days).value_counts().sort_index().to_dict()
+    permonth = result.histograms['stamp']
+    assert permonth.name == 'month' and permonth.sum() == stamps.count()
+    assert permonth.index[0] == pd.Timestamp('2015-01-01')
+
+    # Text with a UTC offset is read in UTC, not dropped
+    offsets = pd.DataFrame({'at':['2020-01-01T00:00:00+01:00',
+                                  '2020-01-02T00:00:00-05:00'] * 50})
+    table = md.describe_data(offsets).date_stats
+    assert table.loc['at','count'] == 100 and table.loc['at','%null'] == 0
+    assert table.loc['at','min'] == pd.Timestamp('2019-12-31 23:00')
+    assert table.loc['at','max'] == pd.Timestamp('2020-01-02 05:00')
+
+    # With no rows there is no date section to show
+    empty = pd.DataFrame({'iso':pd.Series([],dtype=object)})
+    assert md.describe_data(empty).date_stats is None
+    md.megadescribe(empty)
+    assert 'NaT' not in capsys.readouterr().out
+
+def test_sampled_describe_scores_every_row():
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({'num':rng.normal(0,1,5000),
+                       'cat':rng.choice(['a','b','c'],5000).astype(object)})
+    df.loc[4321,['num','cat']] = [9.0,'rare']
+    positions = md._sample_positions(df,500)
+    assert len(positions) == 500 and 4321 not in positions
+    result = md.describe_data(df,sample=500)
+    assert result.sampling['rows'] == 500
+    assert result.sampling['population'] == 5000
+    assert 0 < result.sampling['share'] < 0.05
+    assert result.stats.loc['num','count'] == 5000
+    assert sum(p.rows for p in result.pivots) == 5000
+    # The sample never saw the rare category, but every row is scored
+    assert 4321 in result.unusual_index()
+    whole = md.describe_data(df,sample=1.0)
+    assert whole.sampling['share'] == 0
+    assert whole.pivots[0].top.to_dict() == \
+           df['cat'].value_counts().iloc[:5].to_dict()
+    strata = md._sample_positions(df,100,strata='cat')
+    assert 4321 in strata
+    with pytest.raises(ValueError):
+        md.megadescribe(df,by='cat',sample=100)
+
+    # Rows beyond the sample's range are ranked exactly, not tied
+    tall = pd.DataFrame({'x':rng.exponential(1,20000),
+                         'reg':np.tile(list('abcd'),5000).astype(object)})
+    tall.loc[123,'x'] = 1e6
+    sampled = md.describe_data(tall,sample=0.01,strata='reg')
+    assert sampled.unusual_index() == md.describe_data(tall).unusual_index()
+    assert sampled.unusual['scores'].max().max() <= 1
+    ties = pd.DataFrame({'cat':list('dcbaeffg' * 50)})
+    assert list(md.describe_data(ties,sample=1.0).pivots[0].top.index) == \
+           list('fdcba')
+
+def test_incremental_describer_saves_and_windows(tmp_path):
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'when':pd.Timestamp('2024-01-01') + pd.to_timedelta(
+            np.sort(rng.randint(0,30 * 24,3000)),unit='h'),
+        'num':rng.normal(0,1,3000),
+        'cat':rng.choice(['a','b','c'],3000).astype(object)})
+    state = md.incremental_describer()
+    state.update(df.iloc[:1000]).save(tmp_path / 'state.pkl')
+    state = md.incremental_describer.load(tmp_path / 'state.pkl')
+    state.refresh(df)
+    assert state.rows == 3000
+    result = state.describe()
+    whole = md.describe_data(df)
+    assert result.stats.loc['num','count'] == 3000
+    assert np.isclose(result.stats.loc['num','sum'],df['num'].sum())
+    assert result.pivots[0].top.to_dict() == whole.pivots[0].top.to_dict()
+
+    windowed = md.incremental_describer('when','7D')
+    for end in range(500,3500,500):
+        windowed.refresh(df.iloc[:end])
+    days = df['when'].dt.floor('D')
+    recent = df[days > df['when'].max() - pd.Timedelta('8D')]
+    result = windowed.describe()
+    assert result.stats.loc['num','count'] == len(recent)
+    assert set(result.unusual_index()) <= set(recent.index)